@@ -0,0 +1,22 @@
+"""
+Gunicorn configuration for the Literary Voice API
+Run with: gunicorn server:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Threaded workers: each thread keeps its own SQLite connection
+worker_class = 'gthread'
+workers = 2
+threads = 8
+
+# Keep client connections open between requests (e.g. behind a load balancer)
+keepalive = 30
+timeout = 30
+
+def on_starting(arbiter):
+    """Create tables and indexes once, before workers are forked"""
+    from server import init_db
+    init_db()
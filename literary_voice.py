@@ -5,40 +5,98 @@ A Goodreads-powered book recommendation assistant
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import sys
-import json
+import orjson
 import os
 from pathlib import Path
+from urllib.parse import quote_plus
+from getpass import getpass
 import re
 from bs4 import BeautifulSoup
+import diskcache
 
 # Configuration
 CONFIG_DIR = Path.home() / ".literary-voice"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+CACHE_DIR = CONFIG_DIR / "scrape_cache"
+CACHE_SIZE_LIMIT = 100 * 1024 * 1024  # 100 MB
+SEARCH_CACHE_TTL = 7 * 24 * 3600  # Book search results rarely change
+REVIEW_CACHE_TTL = 24 * 3600  # Likes shift, so refresh reviews daily
+BALANCE_CACHE_TTL = 15  # seconds
+GOODREADS_MIN_GAP = 1.0  # seconds between Goodreads requests
+
+# Review sentiment keywords
+POSITIVE_KEYWORDS = frozenset(['love', 'great', 'amazing', 'perfect', 'best', 'wonderful',
+                               'excellent', 'brilliant', 'beautiful', 'favorite', 'enjoyed'])
+NEGATIVE_KEYWORDS = frozenset(['hate', 'bad', 'worst', 'boring', 'disappointed', 'poor',
+                               'terrible', 'awful', 'waste', 'slow'])
+
+def _keyword_pattern(keywords):
+    """Compile a case-insensitive regex matching words that start with any keyword"""
+    return re.compile(r'\b(?:' + '|'.join(map(re.escape, sorted(keywords))) + ')', re.IGNORECASE)
+
+POSITIVE_RE = _keyword_pattern(POSITIVE_KEYWORDS)
+NEGATIVE_RE = _keyword_pattern(NEGATIVE_KEYWORDS)
+# Scraped text often has no space between sentences ("slow.Overall"), so
+# split after each run of terminal punctuation whether or not space follows
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])(?![.!?])\s*')
+
+# Characters ignored when checking for an ISBN
+ISBN_STRIP_TABLE = str.maketrans('', '', '- ')
 API_BASE_URL = "http://localhost:5000"  # Change to Railway URL after deployment
+REQUEST_TIMEOUT = (3, 10)  # (connect, read) seconds
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
 
 class LiteraryVoice:
+    HEADER = (
+        "\n" + "="*50 + "\n"
+        "           The Literary Voice\n"
+        "        Your AI Reading Companion\n"
+        + "="*50 + "\n"
+    )
+    
     def __init__(self):
         self.api_key = None
         self.email = None
+        self._balance_cache = (None, 0.0)
+        self._last_hit = {}
+        self.session = self.create_session()
+        self.cache = diskcache.Cache(str(CACHE_DIR), size_limit=CACHE_SIZE_LIMIT)
         self.load_config()
     
+    def create_session(self):
+        """Create a keep-alive HTTP session shared by all requests"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            # POSTs are only retried on connection errors, never after being sent
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'User-Agent': USER_AGENT})
+        return session
+    
     def load_config(self):
         """Load saved API key from config file"""
         if CONFIG_FILE.exists():
-            with open(CONFIG_FILE, 'r') as f:
-                config = json.load(f)
+            with open(CONFIG_FILE, 'rb') as f:
+                config = orjson.loads(f.read())
                 self.api_key = config.get('api_key')
                 self.email = config.get('email')
     
     def save_config(self, api_key, email):
         """Save API key to config file"""
         CONFIG_DIR.mkdir(exist_ok=True)
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump({'api_key': api_key, 'email': email}, f)
+        with open(CONFIG_FILE, 'wb') as f:
+            f.write(orjson.dumps({'api_key': api_key, 'email': email}))
         self.api_key = api_key
         self.email = email
+        self._balance_cache = (None, 0.0)
     
     def clear_config(self):
         """Clear saved config (logout)"""
@@ -46,22 +104,30 @@ class LiteraryVoice:
             CONFIG_FILE.unlink()
         self.api_key = None
         self.email = None
+        self._balance_cache = (None, 0.0)
     
     def type_text(self, text, delay=0.02):
         """Print text with typing effect"""
-        for char in text:
-            sys.stdout.write(char)
+        if not sys.stdout.isatty() or os.environ.get('LV_NO_ANIM'):
+            print(text)
+            return
+        
+        # Write a few characters per ~50ms tick rather than one per syscall
+        chunk = max(1, int(0.05 / max(delay, 1e-4)))
+        for i in range(0, len(text), chunk):
+            sys.stdout.write(text[i:i + chunk])
             sys.stdout.flush()
-            time.sleep(delay)
+            time.sleep(delay * chunk)
         print()
     
     def print_header(self):
         """Print the Literary Voice header"""
-        os.system('clear' if os.name == 'posix' else 'cls')
-        print("\n" + "="*50)
-        print("           The Literary Voice")
-        print("        Your AI Reading Companion")
-        print("="*50 + "\n")
+        if os.name == 'nt' and not os.environ.get('WT_SESSION'):
+            # Legacy Windows consoles don't understand ANSI escapes
+            os.system('cls')
+        else:
+            sys.stdout.write('\x1b[2J\x1b[H')
+        print(self.HEADER)
     
     def login(self):
         """Login existing user"""
@@ -69,13 +135,13 @@ class LiteraryVoice:
         print("🔐 Login\n")
         
         email = input("Email: ").strip()
-        password = input("Password: ").strip()
+        password = getpass("Password: ")
         
         try:
-            response = requests.post(f"{API_BASE_URL}/login", json={
+            response = self.session.post(f"{API_BASE_URL}/login", json={
                 'email': email,
                 'password': password
-            })
+            }, timeout=REQUEST_TIMEOUT)
             
             if response.status_code == 200:
                 data = response.json()
@@ -87,6 +153,10 @@ class LiteraryVoice:
                 print(f"\n❌ {response.json().get('error', 'Login failed')}")
                 time.sleep(2)
                 return False
+        except (requests.Timeout, requests.ConnectionError):
+            print("\n❌ Could not reach the server. Please try again later.")
+            time.sleep(2)
+            return False
         except Exception as e:
             print(f"\n❌ Connection error: {e}")
             time.sleep(2)
@@ -98,8 +168,8 @@ class LiteraryVoice:
         print("✨ Sign Up\n")
         
         email = input("Email: ").strip()
-        password = input("Password: ").strip()
-        confirm = input("Confirm Password: ").strip()
+        password = getpass("Password: ")
+        confirm = getpass("Confirm Password: ")
         
         if password != confirm:
             print("\n❌ Passwords don't match!")
@@ -107,10 +177,10 @@ class LiteraryVoice:
             return False
         
         try:
-            response = requests.post(f"{API_BASE_URL}/signup", json={
+            response = self.session.post(f"{API_BASE_URL}/signup", json={
                 'email': email,
                 'password': password
-            })
+            }, timeout=REQUEST_TIMEOUT)
             
             if response.status_code == 201:
                 data = response.json()
@@ -123,6 +193,10 @@ class LiteraryVoice:
                 print(f"\n❌ {response.json().get('error', 'Signup failed')}")
                 time.sleep(2)
                 return False
+        except (requests.Timeout, requests.ConnectionError):
+            print("\n❌ Could not reach the server. Please try again later.")
+            time.sleep(2)
+            return False
         except Exception as e:
             print(f"\n❌ Connection error: {e}")
             time.sleep(2)
@@ -151,15 +225,21 @@ class LiteraryVoice:
                 print("\n❌ Invalid choice!")
                 time.sleep(1)
     
-    def get_balance(self):
-        """Check credit balance"""
+    def get_balance(self, fresh=False):
+        """Check credit balance, reusing a recent value unless fresh is set"""
+        balance, fetched_at = self._balance_cache
+        if not fresh and balance is not None and time.monotonic() - fetched_at < BALANCE_CACHE_TTL:
+            return balance
+        
         try:
-            response = requests.get(f"{API_BASE_URL}/balance", headers={
+            response = self.session.get(f"{API_BASE_URL}/balance", headers={
                 'X-API-Key': self.api_key
-            })
+            }, timeout=REQUEST_TIMEOUT)
             
             if response.status_code == 200:
-                return response.json()['credits']
+                balance = response.json()['credits']
+                self._balance_cache = (balance, time.monotonic())
+                return balance
             return None
         except:
             return None
@@ -167,31 +247,43 @@ class LiteraryVoice:
     def detect_input_type(self, user_input):
         """Detect if input is ISBN or book title"""
         # Remove hyphens and spaces
-        cleaned = user_input.replace('-', '').replace(' ', '')
+        cleaned = user_input.translate(ISBN_STRIP_TABLE)
         
         # ISBN-10 or ISBN-13
-        if cleaned.isdigit() and (len(cleaned) == 10 or len(cleaned) == 13):
+        if len(cleaned) in (10, 13) and cleaned.isdigit():
             return 'isbn', user_input
         
         return 'title', user_input
     
+    def _throttle(self, host, min_gap):
+        """Wait only as long as needed to keep min_gap between hits to host"""
+        wait = min_gap - (time.monotonic() - self._last_hit.get(host, 0))
+        if wait > 0:
+            time.sleep(wait)
+        self._last_hit[host] = time.monotonic()
+    
+    def fetch_page(self, url):
+        """Fetch and parse a Goodreads page over the shared session"""
+        self._throttle('goodreads.com', GOODREADS_MIN_GAP)
+        response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        return BeautifulSoup(response.content, 'lxml')
+    
     def search_goodreads(self, query, input_type):
         """Search for book on Goodreads"""
         print("\n🔍 Searching Goodreads...")
-        time.sleep(0.5)  # Rate limiting
+        
+        key = ('search', input_type, query.lower())
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
         
         try:
             if input_type == 'isbn':
-                search_url = f"https://www.goodreads.com/search?q={query}&search_type=books"
+                search_url = f"https://www.goodreads.com/search?q={quote_plus(query)}&search_type=books"
             else:
-                search_url = f"https://www.goodreads.com/search?q={query.replace(' ', '+')}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
+                search_url = f"https://www.goodreads.com/search?q={quote_plus(query)}"
             
-            response = requests.get(search_url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = self.fetch_page(search_url)
             
             # Find first book result
             book_link = soup.find('a', class_='bookTitle')
@@ -205,11 +297,13 @@ class LiteraryVoice:
             author_link = soup.find('a', class_='authorName')
             author = author_link.text.strip() if author_link else "Unknown"
             
-            return {
+            result = {
                 'title': book_title,
                 'author': author,
                 'url': book_url
             }
+            self.cache.set(key, result, expire=SEARCH_CACHE_TTL)
+            return result
         except Exception as e:
             print(f"Error searching: {e}")
             return None
@@ -217,45 +311,44 @@ class LiteraryVoice:
     def scrape_reviews(self, book_url):
         """Scrape top reviews from Goodreads"""
         print("📖 Analyzing reviews...")
-        time.sleep(1)  # Rate limiting
+        
+        key = ('reviews', book_url)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
         
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
+            soup = self.fetch_page(book_url)
             
-            response = requests.get(book_url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            reviews = []
+            # Rank reviews by likes first; only the winner's text is extracted
+            candidates = []
             review_elements = soup.find_all('div', class_='review', limit=5)
             
             for review in review_elements:
-                # Get review text
                 text_elem = review.find('span', class_='readable')
                 if not text_elem:
                     continue
                 
-                text = text_elem.get_text(strip=True)
-                
                 # Get likes count
                 likes_elem = review.find('span', class_='likesCount')
                 likes = 0
                 if likes_elem:
-                    likes_text = likes_elem.get_text()
-                    nums = re.findall(r'\d+', likes_text)
-                    likes = int(nums[0]) if nums else 0
+                    match = re.search(r'\d+', likes_elem.get_text())
+                    likes = int(match.group()) if match else 0
                 
-                reviews.append({
-                    'text': text,
-                    'likes': likes
-                })
+                candidates.append((likes, text_elem))
             
-            if not reviews:
+            if not candidates:
                 return None
             
             # Return most liked review
-            return max(reviews, key=lambda x: x['likes'])
+            likes, text_elem = max(candidates, key=lambda x: x[0])
+            best = {
+                'text': text_elem.get_text(strip=True),
+                'likes': likes
+            }
+            self.cache.set(key, best, expire=REVIEW_CACHE_TTL)
+            return best
         except Exception as e:
             print(f"Error scraping reviews: {e}")
             return None
@@ -263,23 +356,17 @@ class LiteraryVoice:
     def reformat_review(self, review_text, book_title, author):
         """Simple rule-based review reformatting"""
         # Split into sentences
-        sentences = [s.strip() + '.' for s in review_text.split('.') if s.strip()]
+        sentences = [s for s in SENTENCE_SPLIT_RE.split(review_text.strip()) if s]
         
         # Categorize sentences
-        positive_keywords = ['love', 'great', 'amazing', 'perfect', 'best', 'wonderful', 
-                           'excellent', 'brilliant', 'beautiful', 'favorite', 'enjoyed']
-        negative_keywords = ['hate', 'bad', 'worst', 'boring', 'disappointed', 'poor',
-                           'terrible', 'awful', 'waste', 'slow']
-        
         positive = []
         negative = []
         neutral = []
         
         for sentence in sentences:
-            lower = sentence.lower()
-            if any(word in lower for word in positive_keywords):
+            if POSITIVE_RE.search(sentence):
                 positive.append(sentence)
-            elif any(word in lower for word in negative_keywords):
+            elif NEGATIVE_RE.search(sentence):
                 negative.append(sentence)
             else:
                 neutral.append(sentence)
@@ -324,16 +411,10 @@ class LiteraryVoice:
     def get_author_books(self, author_name):
         """Get books by author from Goodreads"""
         print(f"\n🔍 Finding books by {author_name}...")
-        time.sleep(1)
         
         try:
-            search_url = f"https://www.goodreads.com/search?q={author_name.replace(' ', '+')}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(search_url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            search_url = f"https://www.goodreads.com/search?q={quote_plus(author_name)}"
+            soup = self.fetch_page(search_url)
             
             books = []
             results = soup.find_all('tr', itemtype='http://schema.org/Book', limit=10)
@@ -363,11 +444,17 @@ class LiteraryVoice:
     def deduct_credits(self, amount, action):
         """Deduct credits from user account"""
         try:
-            response = requests.post(f"{API_BASE_URL}/deduct", 
+            response = self.session.post(f"{API_BASE_URL}/deduct", 
                 json={'amount': amount, 'action': action},
-                headers={'X-API-Key': self.api_key}
+                headers={'X-API-Key': self.api_key},
+                timeout=REQUEST_TIMEOUT
             )
-            return response.status_code == 200
+            if response.status_code == 200:
+                # The new balance comes back with the deduction; no refetch needed
+                self._balance_cache = (response.json()['credits'], time.monotonic())
+                return True
+            self._balance_cache = (None, 0.0)
+            return False
         except:
             return False
     
@@ -518,7 +605,7 @@ class LiteraryVoice:
     def handle_balance(self):
         """Handle balance check"""
         self.print_header()
-        balance = self.get_balance()
+        balance = self.get_balance(fresh=True)
         
         if balance is not None:
             print(f"\n💎 Current Balance: {balance} credits\n")
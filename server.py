@@ -4,27 +4,75 @@ Handles authentication and credit management
 """
 
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 import sqlite3
 import hashlib
 import secrets
 import os
+import threading
 from datetime import datetime
 
+class OrjsonProvider(JSONProvider):
+    """Serialize request and response JSON with orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 DATABASE = 'literary_voice.db'
 
-def get_db():
-    """Get database connection"""
-    db = sqlite3.connect(DATABASE)
+# Shared keep-alive session for outbound calls (payments, email, ...)
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=2)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+
+_local = threading.local()
+
+def connect_db():
+    """Open a new database connection in WAL mode"""
+    db = sqlite3.connect(DATABASE, check_same_thread=False)
     db.row_factory = sqlite3.Row
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.execute('PRAGMA temp_store=MEMORY')
+    return db
+
+def get_db():
+    """Get this thread's database connection, opening it on first use"""
+    db = getattr(_local, 'db', None)
+    if db is None:
+        db = _local.db = connect_db()
     return db
 
+@app.teardown_appcontext
+def release_db(exception):
+    """Roll back anything a failed request left uncommitted"""
+    db = getattr(_local, 'db', None)
+    if db is not None and db.in_transaction:
+        db.rollback()
+
 def init_db():
     """Initialize database with tables"""
-    db = get_db()
+    db = connect_db()
     db.execute('''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -46,12 +94,33 @@ def init_db():
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
+    # users.email and users.api_key are already indexed through UNIQUE
+    db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_tx_user_time ON transactions (user_id, timestamp DESC)'
+    )
     db.commit()
+    db.execute('ANALYZE')
     db.close()
 
 def hash_password(password):
-    """Hash password with SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash password with Argon2id"""
+    return password_hasher.hash(password)
+
+def verify_password(password_hash, password):
+    """Check password against an Argon2 or legacy SHA-256 hash"""
+    if not password_hash.startswith('$argon2'):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return secrets.compare_digest(password_hash, legacy)
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def needs_rehash(password_hash):
+    """Check if a stored hash should be upgraded to current Argon2 settings"""
+    if not password_hash.startswith('$argon2'):
+        return True
+    return password_hasher.check_needs_rehash(password_hash)
 
 def generate_api_key():
     """Generate secure API key"""
@@ -75,7 +144,6 @@ def signup():
     # Check if user exists
     existing = db.execute('SELECT id FROM users WHERE email = ?', (email,)).fetchone()
     if existing:
-        db.close()
         return jsonify({'error': 'Email already registered'}), 400
     
     # Create user
@@ -95,10 +163,8 @@ def signup():
             'message': 'Account created successfully'
         }), 201
     except Exception as e:
-        db.close()
+        db.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        db.close()
 
 @app.route('/login', methods=['POST'])
 def login():
@@ -111,18 +177,20 @@ def login():
         return jsonify({'error': 'Email and password required'}), 400
     
     db = get_db()
-    password_hash = hash_password(password)
     
     user = db.execute(
-        'SELECT api_key, credits FROM users WHERE email = ? AND password_hash = ?',
-        (email, password_hash)
+        'SELECT id, password_hash, api_key, credits FROM users WHERE email = ?',
+        (email,)
     ).fetchone()
     
-    db.close()
-    
-    if not user:
+    if not user or not verify_password(user['password_hash'], password):
         return jsonify({'error': 'Invalid email or password'}), 401
     
+    # Upgrade legacy SHA-256 hashes and outdated Argon2 parameters
+    if needs_rehash(user['password_hash']):
+        db.execute('UPDATE users SET password_hash = ? WHERE id = ?', (hash_password(password), user['id']))
+        db.commit()
+    
     return jsonify({
         'api_key': user['api_key'],
         'credits': user['credits'],
@@ -139,7 +207,6 @@ def get_balance():
     
     db = get_db()
     user = db.execute('SELECT credits FROM users WHERE api_key = ?', (api_key,)).fetchone()
-    db.close()
     
     if not user:
         return jsonify({'error': 'Invalid API key'}), 401
@@ -160,35 +227,33 @@ def deduct_credits():
     if amount <= 0:
         return jsonify({'error': 'Invalid amount'}), 400
     
-    db = get_db()
-    
-    # Get user
-    user = db.execute('SELECT id, credits FROM users WHERE api_key = ?', (api_key,)).fetchone()
+    if not isinstance(action, str):
+        return jsonify({'error': 'Invalid action'}), 400
     
-    if not user:
-        db.close()
-        return jsonify({'error': 'Invalid API key'}), 401
-    
-    # Check sufficient credits
-    if user['credits'] < amount:
-        db.close()
-        return jsonify({'error': 'Insufficient credits'}), 402
-    
-    # Deduct credits
-    new_balance = user['credits'] - amount
-    db.execute('UPDATE users SET credits = ? WHERE id = ?', (new_balance, user['id']))
-    
-    # Log transaction
-    db.execute(
-        'INSERT INTO transactions (user_id, amount, action) VALUES (?, ?, ?)',
-        (user['id'], -amount, action)
-    )
+    db = get_db()
     
-    db.commit()
-    db.close()
+    with db:
+        # Deduct credits only if the balance covers it
+        user = db.execute(
+            'UPDATE users SET credits = credits - ? WHERE api_key = ? AND credits >= ? '
+            'RETURNING id, credits',
+            (amount, api_key, amount)
+        ).fetchone()
+        
+        if not user:
+            exists = db.execute('SELECT 1 FROM users WHERE api_key = ?', (api_key,)).fetchone()
+            if not exists:
+                return jsonify({'error': 'Invalid API key'}), 401
+            return jsonify({'error': 'Insufficient credits'}), 402
+        
+        # Log transaction
+        db.execute(
+            'INSERT INTO transactions (user_id, amount, action) VALUES (?, ?, ?)',
+            (user['id'], -amount, action)
+        )
     
     return jsonify({
-        'credits': new_balance,
+        'credits': user['credits'],
         'message': f'{amount} credits deducted'
     }), 200
 
@@ -212,7 +277,6 @@ def add_credits():
     user = db.execute('SELECT id, credits FROM users WHERE email = ?', (email,)).fetchone()
     
     if not user:
-        db.close()
         return jsonify({'error': 'User not found'}), 404
     
     new_balance = user['credits'] + amount
@@ -224,7 +288,6 @@ def add_credits():
     )
     
     db.commit()
-    db.close()
     
     return jsonify({
         'credits': new_balance,
@@ -237,9 +300,10 @@ def health():
     return jsonify({'status': 'healthy', 'service': 'Literary Voice API'}), 200
 
 if __name__ == '__main__':
-    # Initialize database
-    if not os.path.exists(DATABASE):
-        init_db()
+    # Initialize database (safe to rerun; adds any missing indexes)
+    is_new = not os.path.exists(DATABASE)
+    init_db()
+    if is_new:
         print("✅ Database initialized")
     
     # Run server